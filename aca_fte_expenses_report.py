@@ -6,15 +6,19 @@ Data Sources:
 - Historical years (2019-2023): SQLite database (bcla_library.sqlite)
 - Most recent year: CSV export from IPEDS Data Center (aca-ipeds-fte-f2e131-{year}.csv)
 
-Required packages: pandas, openpyxl
-Install with: pip install pandas openpyxl --break-system-packages
+Required packages: pandas, xlsxwriter
+Install with: pip install pandas xlsxwriter --break-system-packages
+
+Optional: pyarrow - caches parsed CSV data as Parquet so re-runs skip CSV parsing
+Install with: pip install pyarrow --break-system-packages
 """
 
 import sqlite3
 import pandas as pd
 import os
+import re
+import importlib.util
 from datetime import datetime
-import glob
 
 # ============================================================================
 # CONFIGURATION
@@ -23,10 +27,55 @@ import glob
 # SQLite database path
 DB_PATH = "bcla_library.sqlite"
 
+# Connection settings for the database - this script only reads from it
+DB_PRAGMAS = [
+    "PRAGMA query_only = ON",           # Guard against accidental writes
+    "PRAGMA cache_size = -262144",      # 256 MB page cache
+    "PRAGMA mmap_size = 268435456",     # Read pages via mmap (256 MB)
+    "PRAGMA temp_store = MEMORY",       # Keep temporary sort/join data in RAM
+]
+
 # CSV file pattern for IPEDS Data Center exports
 # Example: aca-ipeds-fte-f2e131-2024.csv
 CSV_PATTERN = "aca-ipeds-fte-f2e131-*.csv"
 
+# Compiled form of CSV_PATTERN that also captures the 4-digit year
+# (case-insensitive, like the Windows glob it replaced)
+CSV_FILENAME_RE = re.compile(r'^aca-ipeds-fte-f2e131-(\d{4})\.csv$', re.I)
+
+# Excel writer engine - xlsxwriter is considerably faster than openpyxl for writing.
+# Its constant_memory option is not used: pandas writes cells column by column,
+# and constant_memory mode silently drops cells that are not written row by row.
+EXCEL_ENGINE = 'xlsxwriter'
+
+# UNITID is read as a nullable integer everywhere so every year's frame joins
+# on the same key dtype (no int64/float64 mix when a source has missing IDs)
+UNITID_DTYPE = 'Int64'
+SQL_READ_OPTIONS = {'coerce_float': False, 'dtype': {'UNITID': UNITID_DTYPE}}
+
+# Patterns used to recognise the CSV columns, checked in this order for each column
+# (IPEDS Data Center exports don't always use identical column names)
+CSV_COLUMN_PATTERNS = {
+    'unitid': re.compile(r'unitid', re.I),
+    'name': re.compile(r'institution name', re.I),
+    'expenses': re.compile(r'total expenses|f2e', re.I),
+    'fte': re.compile(r'full-time equivalent|drvef', re.I),
+}
+
+# Database tables that carry a year: DRVEF tables (e.g., drvef2019) and
+# finance tables (e.g., f2223_f2 for 2023)
+TABLE_YEAR_RE = re.compile(r'^drvef(\d{4})$|^f(\d{2})(\d{2})_f2$', re.I)
+
+# Parsed CSV data is cached next to each CSV as {csv}.parquet when pyarrow is installed
+PARQUET_CACHE_ENABLED = importlib.util.find_spec('pyarrow') is not None
+
+# Version of the cached CSV data - bump this whenever CSV_COLUMN_PATTERNS, the
+# parsed dtypes or the result columns change, so existing caches are rebuilt
+CSV_CACHE_VERSION = 1
+
+# Year prefix on report columns, e.g. "2023 - F - Total expenses-Total amount"
+COLUMN_YEAR_RE = re.compile(r'^(\d{4})')
+
 # ============================================================================
 # FUNCTIONS
 # ============================================================================
@@ -35,6 +84,8 @@ def get_database_connection():
     """
     Connect to the SQLite database.
     
+    The connection is configured with DB_PRAGMAS for fast read-only access.
+    
     Returns:
         sqlite3.Connection: Database connection, or None if database doesn't exist
     """
@@ -43,7 +94,11 @@ def get_database_connection():
         print("Historical data will not be available")
         return None
     
-    return sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH)
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    
+    return conn
 
 
 def get_available_years_from_db(conn):
@@ -67,19 +122,16 @@ def get_available_years_from_db(conn):
     
     # Look for DRVEF and F tables to extract years
     for table in tables:
-        # DRVEF tables (e.g., drvef2019, drvef2020)
-        if table.lower().startswith('drvef'):
-            year = ''.join(filter(str.isdigit, table))
-            if year and len(year) == 4:
-                years.add(year)
+        match = TABLE_YEAR_RE.match(table)
+        if not match:
+            continue
         
-        # Finance tables (e.g., f2223_f2 for 2023)
-        elif table.lower().startswith('f') and '_f2' in table.lower():
-            year_part = ''.join(filter(str.isdigit, table))[:4]
-            # Convert YYyy to 20yy (e.g., '2223' -> '2023')
-            if len(year_part) == 4:
-                year = '20' + year_part[2:4]
-                years.add(year)
+        if match.group(1):
+            # DRVEF table (e.g., drvef2019)
+            years.add(match.group(1))
+        else:
+            # Finance table - convert YYyy to 20yy (e.g., f2223_f2 -> '2023')
+            years.add('20' + match.group(3))
     
     return sorted(years)
 
@@ -93,17 +145,13 @@ def find_csv_files():
     """
     csv_files = {}
     
-    # Find all matching CSV files
-    for filepath in glob.glob(CSV_PATTERN):
-        filename = os.path.basename(filepath)
-        
-        # Extract year from filename
-        # Pattern: aca-ipeds-fte-f2e131-2024.csv
-        parts = filename.split('-')
-        if len(parts) >= 4:
-            year_str = parts[-1].replace('.csv', '')
-            if year_str.isdigit() and len(year_str) == 4:
-                csv_files[year_str] = filepath
+    # Scan the directory once and pull the year straight out of the filename
+    # Pattern: aca-ipeds-fte-f2e131-2024.csv
+    with os.scandir('.') as entries:
+        for entry in entries:
+            match = CSV_FILENAME_RE.match(entry.name)
+            if match:
+                csv_files[match.group(1)] = entry.path
     
     return csv_files
 
@@ -117,7 +165,7 @@ def get_data_from_db(conn, year):
         year (str): Year to extract (e.g., '2019', '2020')
         
     Returns:
-        pandas.DataFrame: DataFrame with UNITID, Institution Name, Total Expenses, and FTE
+        pandas.DataFrame: DataFrame indexed on UNITID with Institution Name, Total Expenses, and FTE
     """
     cursor = conn.cursor()
     
@@ -131,98 +179,137 @@ def get_data_from_db(conn, year):
     # Use the most recent HD table
     hd_table = sorted(hd_tables)[-1] if hd_tables else None
     
-    # Build the data dictionary
-    data = {}
-    
-    # Start with institution IDs and names
-    if hd_table:
-        query = f"SELECT UNITID, INSTNM FROM {hd_table}"
-        institutions_df = pd.read_sql_query(query, conn)
-        
-        for _, row in institutions_df.iterrows():
-            unitid = row['UNITID']
-            data[unitid] = {
-                'UNITID': unitid,
-                'Institution Name': row['INSTNM']
-            }
-    
-    # Get FTE from DRVEF table
-    drvef_table = f"drvef{year}"
-    if drvef_table in tables:
-        query = f"SELECT UNITID, FTE FROM {drvef_table}"
-        fte_df = pd.read_sql_query(query, conn)
-        
-        for _, row in fte_df.iterrows():
-            unitid = row['UNITID']
-            if unitid not in data:
-                data[unitid] = {'UNITID': unitid, 'Institution Name': None}
-            data[unitid][f'{year} - DRVEF - Full-time equivalent fall enrollment'] = row['FTE']
-    
-    # Get Total Expenses from Finance table
+    # Data tables for this year: (table, variable, report column name)
     # Finance tables are named like f2223_f2 for 2023
     prev_year = str(int(year) - 1)
-    finance_table = f"f{prev_year[-2:]}{year[-2:]}_f2"
+    data_tables = [
+        (f"drvef{year}", 'FTE', f'{year} - DRVEF - Full-time equivalent fall enrollment'),
+        (f"f{prev_year[-2:]}{year[-2:]}_f2", 'F2E131', f'{year} - F - Total expenses-Total amount'),
+    ]
+    data_tables = [t for t in data_tables if t[0] in tables]
+    
+    rename_map = {'INSTNM': 'Institution Name'}
+    rename_map.update({var: col for _, var, col in data_tables})
+    
+    # Every institution in the HD table or in this year's data tables, so an
+    # institution missing from the HD table is kept (with a blank name)
+    unitid_sources = ([hd_table] if hd_table else []) + [t for t, _, _ in data_tables]
+    if not unitid_sources:
+        print(f"  ⚠ No HD or data tables found for {year}")
+        empty_df = pd.DataFrame(columns=['UNITID', 'INSTNM']).astype({'UNITID': UNITID_DTYPE})
+        return empty_df.rename(columns=rename_map).set_index('UNITID')
+    
+    unitid_union = " UNION ".join(
+        f"SELECT UNITID FROM {t} WHERE UNITID IS NOT NULL" for t in unitid_sources
+    )
+    
+    # Let SQLite join the names, FTE and expenses columns onto the institution
+    # list in a single query
+    select_cols = ["u.UNITID", ("h.INSTNM" if hd_table else "NULL") + " AS INSTNM"]
+    joins = [f"LEFT JOIN {hd_table} h ON u.UNITID = h.UNITID"] if hd_table else []
+    for i, (table, var, _) in enumerate(data_tables):
+        select_cols.append(f"t{i}.{var}")
+        joins.append(f"LEFT JOIN {table} t{i} ON u.UNITID = t{i}.UNITID")
+    
+    query = f"SELECT {', '.join(select_cols)} FROM ({unitid_union}) u {' '.join(joins)}"
+    result_df = pd.read_sql_query(query, conn, **SQL_READ_OPTIONS)
+    
+    # A duplicate UNITID in any table would silently inflate rows in the join
+    if result_df['UNITID'].duplicated().any():
+        raise ValueError(f"Duplicate UNITIDs found in the {year} database tables")
+    
+    return result_df.rename(columns=rename_map).set_index('UNITID')
+
+
+def resolve_csv_columns(header_cols):
+    """
+    Identify the UNITID, name, expenses, and FTE columns in a CSV header.
+    
+    Columns are classified with CSV_COLUMN_PATTERNS.
+    Expected columns: UnitID, Institution Name, Total expenses-Total amount (F2324_F2), Full-time equivalent fall enrollment (DRVEF2024)
     
-    if finance_table in tables:
-        query = f"SELECT UNITID, F2E131 FROM {finance_table}"
-        expenses_df = pd.read_sql_query(query, conn)
+    Args:
+        header_cols (list): Column names from the CSV header
         
-        for _, row in expenses_df.iterrows():
-            unitid = row['UNITID']
-            if unitid not in data:
-                data[unitid] = {'UNITID': unitid, 'Institution Name': None}
-            data[unitid][f'{year} - F - Total expenses-Total amount'] = row['F2E131']
+    Returns:
+        tuple: (unitid_col, name_col, expenses_col, fte_col), with None for any column not found
+    """
+    found = dict.fromkeys(CSV_COLUMN_PATTERNS)
     
-    # Convert to DataFrame
-    result_df = pd.DataFrame.from_dict(data, orient='index')
-    result_df = result_df.reset_index(drop=True)
+    for col in header_cols:
+        # Assign the column to the first role whose pattern matches it
+        for role, pattern in CSV_COLUMN_PATTERNS.items():
+            if pattern.search(col):
+                found[role] = col
+                break
     
-    # Sort by Institution Name
-    result_df = result_df.sort_values('Institution Name').reset_index(drop=True)
+    return found['unitid'], found['name'], found['expenses'], found['fte']
+
+
+def check_csv_unitids(df, year):
+    """
+    Drop rows without a UNITID and make sure the remaining UNITIDs are unique.
     
-    return result_df
+    IPEDS CSV exports can end with blank rows, and every year's data is later
+    joined on UNITID, which needs a unique index.
+    
+    Args:
+        df (DataFrame): CSV data indexed on UNITID
+        year (str): Year of the CSV (for the error message)
+        
+    Returns:
+        pandas.DataFrame: The data without blank-UNITID rows
+    """
+    df = df[df.index.notna()]
+    
+    if df.index.duplicated().any():
+        raise ValueError(f"Duplicate UNITIDs found in the {year} CSV file")
+    
+    return df
 
 
-def get_data_from_csv(csv_filepath):
+def get_data_from_csv(csv_filepath, year_str):
     """
     Extract FTE and Total Expenses data from a CSV file.
     
+    If pyarrow is installed, the result is cached as {csv_filepath}.parquet and
+    reused on later runs while the CSV's modification time and size, and
+    CSV_CACHE_VERSION, exactly match the ones recorded in the cache.
+    
     Args:
         csv_filepath (str): Path to the CSV file
+        year_str (str): Year of the CSV, as captured from its filename by find_csv_files
         
     Returns:
-        tuple: (year, pandas.DataFrame) Year string and DataFrame with data
+        pandas.DataFrame: DataFrame with data, indexed on UNITID
     """
-    # Extract year from filename
-    filename = os.path.basename(csv_filepath)
-    year_str = filename.split('-')[-1].replace('.csv', '')
-    
-    # Read the CSV
-    df = pd.read_csv(csv_filepath)
-    
-    # Standardize column names
-    # Expected columns: UnitID, Institution Name, Total expenses-Total amount (F2324_F2), Full-time equivalent fall enrollment (DRVEF2024)
-    
-    # Find the columns (they may have slightly different names)
-    unitid_col = None
-    name_col = None
-    expenses_col = None
-    fte_col = None
-    
-    for col in df.columns:
-        col_lower = col.lower()
-        if 'unitid' in col_lower or col == 'UnitID':
-            unitid_col = col
-        elif 'institution name' in col_lower:
-            name_col = col
-        elif 'total expenses' in col_lower or 'f2e' in col_lower:
-            expenses_col = col
-        elif 'full-time equivalent' in col_lower or 'drvef' in col_lower:
-            fte_col = col
+    # Use the cached copy only if it was made from this exact CSV by this
+    # version of the parsing code (a replaced CSV can be older than the cache,
+    # so mtimes aren't compared)
+    cache_path = csv_filepath + '.parquet'
+    csv_stat = os.stat(csv_filepath)
+    cache_key = f"v{CSV_CACHE_VERSION}:{csv_stat.st_mtime_ns}-{csv_stat.st_size}"
+    if PARQUET_CACHE_ENABLED and os.path.exists(cache_path):
+        result_df = pd.read_parquet(cache_path, engine='pyarrow')
+        if result_df.attrs.get('cache_key') == cache_key:
+            return check_csv_unitids(result_df, year_str)
+    
+    # Read just the header first to find the columns we need
+    header_cols = pd.read_csv(csv_filepath, nrows=0).columns
+    unitid_col, name_col, expenses_col, fte_col = resolve_csv_columns(header_cols)
     
     if not all([unitid_col, expenses_col, fte_col]):
         raise ValueError(f"Could not find required columns in {csv_filepath}")
     
+    # Now parse only those columns, with their types set up front
+    usecols = [c for c in (unitid_col, name_col, expenses_col, fte_col) if c]
+    df = pd.read_csv(
+        csv_filepath,
+        usecols=usecols,
+        dtype={unitid_col: UNITID_DTYPE, expenses_col: 'Float64', fte_col: 'Float64'},
+        memory_map=True
+    )
+    
     # Create result DataFrame
     result_df = pd.DataFrame()
     result_df['UNITID'] = df[unitid_col]
@@ -235,30 +322,36 @@ def get_data_from_csv(csv_filepath):
     result_df[f'{year_str} - F - Total expenses-Total amount'] = df[expenses_col]
     result_df[f'{year_str} - DRVEF - Full-time equivalent fall enrollment'] = df[fte_col]
     
-    # Sort by Institution Name
-    result_df = result_df.sort_values('Institution Name').reset_index(drop=True)
+    result_df = check_csv_unitids(result_df.set_index('UNITID'), year_str)
     
-    return year_str, result_df
+    # Cache for the next run - a failed write only costs the speedup
+    # (pandas stores df.attrs, and so the cache key, in the Parquet metadata)
+    if PARQUET_CACHE_ENABLED:
+        result_df.attrs['cache_key'] = cache_key
+        try:
+            result_df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+        except OSError as e:
+            print(f"  ⚠ Warning: Could not write cache {cache_path}: {e}")
+    
+    return result_df
 
 
-def generate_combined_report(conn, csv_files):
+def load_year_data(conn, csv_files, db_years):
     """
-    Generate a combined report with all years.
+    Load the data for every available year, once, from its preferred source.
     
     Args:
         conn: SQLite database connection (may be None)
         csv_files (dict): Dictionary mapping year to CSV filepath
+        db_years (list): Years available in the database, from get_available_years_from_db
         
     Returns:
-        pandas.DataFrame: Combined report with all years
+        dict: Dictionary mapping year to DataFrame (indexed on UNITID), in year order
     """
     print(f"\n{'='*70}")
-    print("Generating Combined Report")
+    print("Loading Data")
     print(f"{'='*70}")
     
-    # Get available years from database
-    db_years = get_available_years_from_db(conn) if conn else []
-    
     # Get available years from CSV files
     csv_years = sorted(csv_files.keys())
     
@@ -270,19 +363,17 @@ def generate_combined_report(conn, csv_files):
     print(f"  CSV years: {csv_years if csv_years else 'None'}")
     print(f"  Total years: {all_years}")
     
-    # Start with institution list
-    result_df = None
+    year_data = {}
     
-    # Process each year
     for year in all_years:
-        print(f"\nProcessing year {year}...")
+        print(f"\nLoading year {year}...")
         
         year_df = None
         
         # Prefer CSV data if available (it's the most recent/authoritative)
         if year in csv_files:
             print(f"  Using CSV: {os.path.basename(csv_files[year])}")
-            _, year_df = get_data_from_csv(csv_files[year])
+            year_df = get_data_from_csv(csv_files[year], year)
         
         # Otherwise use database
         elif conn and year in db_years:
@@ -293,58 +384,71 @@ def generate_combined_report(conn, csv_files):
             print(f"  ⚠ No data found for year {year}")
             continue
         
-        # Merge with result
-        if result_df is None:
-            result_df = year_df
-        else:
-            # Merge on UNITID
-            result_df = result_df.merge(
-                year_df, 
-                on='UNITID', 
-                how='outer',
-                suffixes=('', '_dup')
-            )
-            
-            # Handle duplicate Institution Name column
-            if 'Institution Name_dup' in result_df.columns:
-                # Use non-null values from either column
-                result_df['Institution Name'] = result_df['Institution Name'].fillna(
-                    result_df['Institution Name_dup']
-                )
-                result_df = result_df.drop(columns=['Institution Name_dup'])
+        year_data[year] = year_df
+        print(f"  ✓ Loaded {len(year_df)} institutions")
+    
+    return year_data
+
+
+def generate_combined_report(year_data):
+    """
+    Generate a combined report with all years.
+    
+    Args:
+        year_data (dict): Dictionary mapping year to DataFrame, from load_year_data
         
-        print(f"  ✓ Added {len(year_df)} institutions")
+    Returns:
+        pandas.DataFrame: Combined report with all years
+    """
+    print(f"\n{'='*70}")
+    print("Generating Combined Report")
+    print(f"{'='*70}")
     
-    if result_df is None:
+    # Join the UNITID-indexed year frames all at once
+    frames = list(year_data.values())
+    
+    if not frames:
         print("\n✗ No data available to generate report")
         return None
     
-    # Reorder columns: UNITID, Institution Name, then years in chronological order
-    cols = ['UNITID', 'Institution Name']
+    # Outer-join all years on UNITID in a single pass (get_data_from_db and
+    # get_data_from_csv already guarantee each year's UNITIDs are unique)
+    result_df = pd.concat(frames, axis=1, join='outer')
     
-    # Add year columns in order
-    for year in all_years:
-        for col in result_df.columns:
-            if col.startswith(year) and col not in cols:
-                cols.append(col)
+    # Each year contributes its own Institution Name column - keep the first
+    # non-null name (in year order) for each institution
+    name_cols = result_df['Institution Name']
+    if isinstance(name_cols, pd.DataFrame):
+        names = name_cols.bfill(axis=1).iloc[:, 0]
+        result_df = result_df.drop(columns=['Institution Name'])
+        result_df.insert(0, 'Institution Name', names)
+    
+    result_df = result_df.reset_index()
+    
+    # Reorder columns: UNITID, Institution Name, then years in chronological order
+    # (sorted() is stable, so columns within a year keep their original order)
+    def column_order(col):
+        if col in ('UNITID', 'Institution Name'):
+            return (0, 0)
+        match = COLUMN_YEAR_RE.match(col)
+        return (1, int(match.group(1)) if match else 9999)
     
-    result_df = result_df[cols]
+    result_df = result_df[sorted(result_df.columns, key=column_order)]
     
-    # Sort by Institution Name
-    result_df = result_df.sort_values('Institution Name').reset_index(drop=True)
+    # Sort by Institution Name (the only sort - the per-year frames are left unsorted)
+    result_df = result_df.sort_values('Institution Name', kind='stable').reset_index(drop=True)
     
     print(f"\n✓ Combined report: {len(result_df)} institutions × {len(result_df.columns)} columns")
     
     return result_df
 
 
-def generate_year_reports(conn, csv_files):
+def generate_year_reports(year_data):
     """
     Generate separate reports for each year.
     
     Args:
-        conn: SQLite database connection (may be None)
-        csv_files (dict): Dictionary mapping year to CSV filepath
+        year_data (dict): Dictionary mapping year to DataFrame, from load_year_data
         
     Returns:
         dict: Dictionary mapping year to DataFrame
@@ -353,33 +457,12 @@ def generate_year_reports(conn, csv_files):
     print("Generating Year-Specific Reports")
     print(f"{'='*70}")
     
-    # Get available years
-    db_years = get_available_years_from_db(conn) if conn else []
-    csv_years = sorted(csv_files.keys())
-    all_years = sorted(set(db_years + csv_years))
-    
     year_reports = {}
     
-    for year in all_years:
+    for year, year_df in year_data.items():
         print(f"\nYear {year}...")
         
-        year_df = None
-        
-        # Prefer CSV data if available
-        if year in csv_files:
-            print(f"  Using CSV: {os.path.basename(csv_files[year])}")
-            _, year_df = get_data_from_csv(csv_files[year])
-        
-        # Otherwise use database
-        elif conn and year in db_years:
-            print(f"  Using database")
-            year_df = get_data_from_db(conn, year)
-        
-        if year_df is None:
-            print(f"  ⚠ No data found")
-            continue
-        
-        # Rename columns to remove year prefix (since it's in the filename)
+        # Rename columns to remove year prefix (since it's in the sheet name)
         # Example: "2023 - F - Total expenses-Total amount" -> "F - Total expenses-Total amount"
         rename_map = {}
         for col in year_df.columns:
@@ -387,7 +470,10 @@ def generate_year_reports(conn, csv_files):
                 new_name = col.replace(f'{year} - ', '')
                 rename_map[col] = new_name
         
-        year_df = year_df.rename(columns=rename_map)
+        year_df = year_df.rename(columns=rename_map).reset_index()
+        
+        # Sort by Institution Name
+        year_df = year_df.sort_values('Institution Name', kind='stable').reset_index(drop=True)
         
         year_reports[year] = year_df
         print(f"  ✓ {len(year_df)} institutions × {len(year_df.columns)} columns")
@@ -397,7 +483,10 @@ def generate_year_reports(conn, csv_files):
 
 def save_reports(combined_df=None, year_reports=None, output_dir=None):
     """
-    Save reports to Excel files.
+    Save reports to a single Excel workbook.
+    
+    The combined report goes on a "Combined" sheet and each year-specific
+    report gets its own sheet named after the year.
     
     Args:
         combined_df (DataFrame): Combined report across all years
@@ -416,33 +505,37 @@ def save_reports(combined_df=None, year_reports=None, output_dir=None):
     print("Saving Reports")
     print(f"{'='*70}")
     
-    saved_files = []
+    if combined_df is None and not year_reports:
+        print("✗ Nothing to save")
+        return []
+    
+    filename = os.path.join(output_dir, f"ACA_Member_FTE_Expenses_{timestamp}.xlsx")
     
-    # Save combined report
-    if combined_df is not None:
-        filename = os.path.join(output_dir, f"ACA_Member_FTE_Expenses_Combined_{timestamp}.xlsx")
-        combined_df.to_excel(filename, index=False)
-        print(f"✓ Saved combined report: {filename}")
-        saved_files.append(filename)
+    with pd.ExcelWriter(filename, engine=EXCEL_ENGINE) as writer:
+        # Save combined report
+        if combined_df is not None:
+            combined_df.to_excel(writer, sheet_name='Combined', index=False)
+            print(f"✓ Added combined report (sheet 'Combined')")
+        
+        # Save year-specific reports
+        if year_reports:
+            for year, df in year_reports.items():
+                df.to_excel(writer, sheet_name=str(year), index=False)
+                print(f"✓ Added {year} report (sheet '{year}')")
     
-    # Save year-specific reports
-    if year_reports:
-        for year, df in year_reports.items():
-            filename = os.path.join(output_dir, f"ACA_Member_FTE_Expenses_{year}_{timestamp}.xlsx")
-            df.to_excel(filename, index=False)
-            print(f"✓ Saved {year} report: {filename}")
-            saved_files.append(filename)
+    print(f"✓ Saved workbook: {filename}")
     
-    return saved_files
+    return [filename]
 
 
-def print_summary(conn, csv_files):
+def print_summary(conn, csv_files, db_years):
     """
     Print a summary of available data sources.
     
     Args:
         conn: SQLite database connection (may be None)
         csv_files (dict): Dictionary mapping year to CSV filepath
+        db_years (list): Years available in the database, from get_available_years_from_db
     """
     print(f"\n{'='*70}")
     print("Data Source Summary")
@@ -450,7 +543,6 @@ def print_summary(conn, csv_files):
     
     # Database info
     if conn:
-        db_years = get_available_years_from_db(conn)
         print(f"\nSQLite Database ({DB_PATH}):")
         print(f"  Available years: {', '.join(db_years) if db_years else 'None'}")
     else:
@@ -465,7 +557,6 @@ def print_summary(conn, csv_files):
         print(f"  No CSV files found matching pattern: {CSV_PATTERN}")
     
     # All available years
-    db_years = get_available_years_from_db(conn) if conn else []
     csv_years = sorted(csv_files.keys())
     all_years = sorted(set(db_years + csv_years))
     
@@ -489,11 +580,13 @@ def main():
     # Find CSV files
     csv_files = find_csv_files()
     
+    # Look up the database years once and share them with every step below
+    db_years = get_available_years_from_db(conn) if conn else []
+    
     # Print summary
-    print_summary(conn, csv_files)
+    print_summary(conn, csv_files, db_years)
     
     # Check if we have any data
-    db_years = get_available_years_from_db(conn) if conn else []
     if not db_years and not csv_files:
         print("\n✗ Error: No data sources found")
         print("Please ensure:")
@@ -507,8 +600,8 @@ def main():
     print(f"\n{'='*70}")
     print("Report Options")
     print(f"{'='*70}")
-    print("1. Combined report (all years in one file)")
-    print("2. Separate reports by year")
+    print("1. Combined report (all years on one sheet)")
+    print("2. Separate reports by year (one sheet per year)")
     print("3. Both")
     
     choice = input("\nEnter your choice (1/2/3): ").strip()
@@ -516,11 +609,15 @@ def main():
     combined_df = None
     year_reports = None
     
+    # Load each year once - both report types are built from the same data
+    if choice in ['1', '2', '3']:
+        year_data = load_year_data(conn, csv_files, db_years)
+    
     if choice in ['1', '3']:
-        combined_df = generate_combined_report(conn, csv_files)
+        combined_df = generate_combined_report(year_data)
     
     if choice in ['2', '3']:
-        year_reports = generate_year_reports(conn, csv_files)
+        year_reports = generate_year_reports(year_data)
     
     # Save reports
     if combined_df is not None or year_reports is not None:
@@ -534,7 +631,7 @@ def main():
             print(f"  • {os.path.basename(f)}")
         
         print(f"\nNext steps:")
-        print("  1. Review the Excel files to ensure data looks correct")
+        print("  1. Review the Excel workbook to ensure data looks correct")
         print("  2. Share with committee or upload to Airtable as needed")
     else:
         print("\n✗ No reports generated")
@@ -7,7 +7,7 @@ table in Airtable.
 Long format means: one row per institution per year.
 Example: 34 institutions x 6 years = up to 204 rows.
 
-This is different from the wide-format reports (BCLA_Library_Combined_*.xlsx)
+This is different from the wide-format reports (the BCLA_Library_*.xlsx "Combined" sheet)
 where all years are spread across columns. Long format works much better in
 Airtable because you can filter by year, sort by any field, and add new years
 by simply importing additional rows.
@@ -12,6 +12,7 @@ import pandas as pd
 import pyodbc
 import os
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # ============================================================================
 # CONFIGURATION
@@ -55,12 +56,23 @@ BCLA_UNITIDS = [
     141361,  # Young Harris College
 ]
 
+# Same IDs as a frozenset, for fast membership tests when filtering
+BCLA_UNITIDS_SET = frozenset(BCLA_UNITIDS)
+
 # Years to process (IPEDS survey years)
 YEARS = [2019, 2020, 2021, 2022, 2023, 2024]
 
 # SQLite database path
 DB_PATH = "bcla_library.sqlite"
 
+# Bulk-insert settings for writing to SQLite
+# Rows are inserted up to INSERT_CHUNKSIZE at a time with multi-row INSERTs, but
+# each statement must stay under the linked SQLite library's bound-variable
+# limit (999 before SQLite 3.32, 32766 since), read from the connection where
+# Python can (3.11+) and otherwise assumed to be the old, safe default
+INSERT_CHUNKSIZE = 1000
+SQLITE_DEFAULT_MAX_VARIABLES = 999
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -91,13 +103,14 @@ def connect_to_accdb(accdb_file):
         return None
 
 
-def get_table_from_accdb(conn, table_name, filter_unitids=True):
+def get_table_from_accdb(conn, table_name, existing_tables, filter_unitids=True):
     """
     Extract a specific table from the Access database.
     
     Args:
         conn: pyodbc connection to the Access database
         table_name (str): Name of the table to extract
+        existing_tables (set): Names of the tables in the database (from list_accdb_tables)
         filter_unitids (bool): Whether to filter by BCLA institution IDs
         
     Returns:
@@ -105,23 +118,35 @@ def get_table_from_accdb(conn, table_name, filter_unitids=True):
     """
     try:
         # First check if the table exists
-        cursor = conn.cursor()
-        tables = [row.table_name for row in cursor.tables(tableType='TABLE')]
-        
-        if table_name not in tables:
+        if table_name not in existing_tables:
             print(f"  Warning: Table {table_name} not found in database")
             return None
         
-        # Read the table into a pandas DataFrame
+        # Filter by BCLA institution IDs if requested
+        # The filter goes in the query itself so the Access driver only returns
+        # BCLA rows, instead of every institution in the country
+        cursor = conn.cursor()
         query = f"SELECT * FROM [{table_name}]"
-        df = pd.read_sql(query, conn)
+        filtered = False
+        if filter_unitids:
+            columns = {row.column_name for row in cursor.columns(table=table_name)}
+            if 'UNITID' in columns:
+                id_list = ",".join(map(str, BCLA_UNITIDS))
+                query += f" WHERE UNITID IN ({id_list})"
+                filtered = True
         
-        print(f"  Read {len(df)} rows from {table_name}")
+        # Read the table into a pandas DataFrame
+        # Fetching all rows straight from the cursor skips pd.read_sql's per-row overhead;
+        # pyodbc Row objects are converted to tuples so pandas sees plain records
+        cursor.execute(query)
+        columns = [column[0] for column in cursor.description]
+        rows = [tuple(row) for row in cursor.fetchall()]
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
         
-        # Filter by BCLA institution IDs if requested
-        if filter_unitids and 'UNITID' in df.columns:
-            df = df[df['UNITID'].isin(BCLA_UNITIDS)]
-            print(f"  Filtered to {len(df)} BCLA institutions")
+        if filtered:
+            print(f"  Read {len(df)} BCLA institution rows from {table_name}")
+        else:
+            print(f"  Read {len(df)} rows from {table_name}")
         
         return df
         
@@ -130,6 +155,20 @@ def get_table_from_accdb(conn, table_name, filter_unitids=True):
         return None
 
 
+def list_accdb_tables(conn):
+    """
+    Get the names of all tables in the Access database.
+    
+    Args:
+        conn: pyodbc connection to the Access database
+        
+    Returns:
+        set: Table names
+    """
+    cursor = conn.cursor()
+    return {row.table_name for row in cursor.tables(tableType='TABLE')}
+
+
 def process_year(year, accdb_path):
     """
     Process all tables for a specific year from an accdb file.
@@ -153,6 +192,9 @@ def process_year(year, accdb_path):
     # Dictionary to store all extracted tables
     tables_data = {}
     
+    # Look up the database's table list once for all the extractions below
+    existing_tables = list_accdb_tables(conn)
+    
     # Define which tables we need for this year
     # Table numbers are used to match tables across years
     # From project-variables-accdb.xlsx:
@@ -178,7 +220,7 @@ def process_year(year, accdb_path):
         # But we'll filter it when we save to SQLite
         filter_by_unitid = (table_name != f'HD{year}')
         
-        df = get_table_from_accdb(conn, table_name, filter_unitids=filter_by_unitid)
+        df = get_table_from_accdb(conn, table_name, existing_tables, filter_unitids=filter_by_unitid)
         
         if df is not None:
             tables_data[table_name.lower()] = df
@@ -205,21 +247,48 @@ def save_to_sqlite(tables_dict, db_path):
     # Connect to SQLite database (creates it if it doesn't exist)
     conn = sqlite3.connect(db_path)
     
+    # This is a one-off bulk load into a fresh file, so skip the fsyncs and keep
+    # the rollback journal and temporary tables in memory (pandas commits after every table)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    
+    # Most values one INSERT statement can bind in this SQLite build
+    if hasattr(conn, 'getlimit'):
+        max_variables = conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    else:
+        max_variables = SQLITE_DEFAULT_MAX_VARIABLES
+    
     # Save each table
     for table_name, df in tables_dict.items():
         # Filter HD table to only BCLA institutions when saving
         if 'hd' in table_name and 'UNITID' in df.columns:
-            df = df[df['UNITID'].isin(BCLA_UNITIDS)]
-            # Only keep UNITID and INSTNM columns
-            if 'INSTNM' in df.columns:
-                df = df[['UNITID', 'INSTNM']]
+            mask = df['UNITID'].isin(BCLA_UNITIDS_SET)
+            # Only keep UNITID and INSTNM columns (filter and project in one step)
+            columns = ['UNITID', 'INSTNM'] if 'INSTNM' in df.columns else df.columns
+            df = df.loc[mask, columns]
         
         # Write to SQLite
         # if_exists='replace' means if the table already exists, replace it
         # index=False means don't save the pandas row numbers as a column
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+        # method='multi' inserts many rows per INSERT statement, as many as fit
+        # under the connection's variable limit
+        chunksize = max(1, min(INSERT_CHUNKSIZE, max_variables // max(1, len(df.columns))))
+        df.to_sql(table_name, conn, if_exists='replace', index=False,
+                  method='multi', chunksize=chunksize)
         print(f"✓ Saved {table_name}: {len(df)} rows")
     
+    # Index every table on UNITID so the report generators can join and
+    # count institutions without scanning whole tables
+    for table_name, df in tables_dict.items():
+        if 'UNITID' in df.columns:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_unitid ON {table_name} (UNITID)")
+    conn.commit()
+    
+    # Leave the database file in WAL mode (journal_mode is stored in the file;
+    # synchronous is per connection, so later scripts set their own)
+    conn.execute("PRAGMA journal_mode=WAL")
+    
     conn.close()
     print(f"\n✓ All tables saved to {db_path}")
 
@@ -289,7 +358,17 @@ def main():
     # Dictionary to store all tables from all years
     all_tables = {}
     
-    # Process each year
+    # List the .accdb files in the current directory once
+    # Scanning the absolute directory path gives absolute file paths (required by Access driver)
+    # Names are keyed in lowercase, so 'IPEDS202324.ACCDB' still matches (as it would on Windows)
+    present_files = {
+        entry.name.lower(): entry.path
+        for entry in os.scandir(os.getcwd())
+        if entry.name.lower().endswith('.accdb') and entry.is_file()
+    }
+    
+    # Find the .accdb file for each year
+    year_files = {}
     for year in YEARS:
         # Construct the expected filename for the accdb file
         # IPEDS uses format like "IPEDS201920.accdb" for 2019-20 academic year
@@ -297,19 +376,27 @@ def main():
         accdb_filename = f"IPEDS{year}{str(year+1)[-2:]}.accdb"
         
         # Check if file exists in current directory
-        if not os.path.exists(accdb_filename):
+        if accdb_filename.lower() not in present_files:
             print(f"\n⚠ Warning: {accdb_filename} not found")
             print(f"  Please ensure the file is in the current directory")
             continue
         
-        # Convert to absolute path (required by Access driver)
-        accdb_path = os.path.abspath(accdb_filename)
-                
-        # Process this year
-        year_tables = process_year(year, accdb_path)
-        
-        # Add to our collection
-        all_tables.update(year_tables)
+        year_files[year] = present_files[accdb_filename.lower()]
+    
+    # Process the years in parallel, one worker process per file
+    # Each worker opens its own Access connection; only the SQLite save below is serial
+    # (progress messages from different years may be interleaved)
+    if year_files:
+        max_workers = min(len(year_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                year: executor.submit(process_year, year, accdb_path)
+                for year, accdb_path in year_files.items()
+            }
+            
+            # Add to our collection in year order, so tables are saved in a consistent order
+            for year, future in futures.items():
+                all_tables.update(future.result())
     
     # Save everything to SQLite
     if all_tables:
@@ -3,14 +3,16 @@ BCLA Library Data - Report Generator
 This script generates Excel reports from the SQLite database
 for presentation to the committee.
 
-Required packages: pandas, openpyxl
-Install with: pip install pandas openpyxl --break-system-packages
+Required packages: pandas, xlsxwriter
+Install with: pip install pandas xlsxwriter --break-system-packages
 """
 
 import sqlite3
 import pandas as pd
 import os
+import re
 from datetime import datetime
+from functools import lru_cache
 
 # ============================================================================
 # CONFIGURATION
@@ -29,6 +31,25 @@ VARIABLE_FILTERS = {
     'drval': None               # Include ALL variables from DRVAL tables
 }
 
+# Store each filter as a frozenset for fast lookups (None = include everything)
+VARIABLE_FILTERS = {
+    table_type: (frozenset(var_names) if var_names else None)
+    for table_type, var_names in VARIABLE_FILTERS.items()
+}
+
+# Table name patterns for extracting years
+# Finance tables are named for the fiscal year span, e.g. 'f2223_f2' -> 2023 (the end year)
+FINANCE_YEAR_RE = re.compile(r'^f(\d{2})(\d{2})_', re.I)
+YEAR_RE = re.compile(r'\d{4}')
+
+# Engine used to write the Excel reports (faster than the openpyxl default).
+# constant_memory mode is left off because pandas fills each sheet a column at
+# a time, and that mode only keeps cells written in row order.
+EXCEL_ENGINE = 'xlsxwriter'
+
+# Table types that hold report data (HD tables only supply institution names)
+DATA_TABLE_TYPES = ('drvef', 'al', 'drval', 'f')
+
 # ============================================================================
 # FUNCTIONS
 # ============================================================================
@@ -49,33 +70,75 @@ def get_database_tables(conn):
     return tables
 
 
-def get_column_title(cursor, var_name):
+def get_variable_titles(conn):
+    """
+    Load the whole variable_titles lookup table into a dictionary.
+    
+    Args:
+        conn: SQLite database connection
+        
+    Returns:
+        dict: Mapping of varName to user-friendly title (empty if the table doesn't exist)
+    """
+    titles = {}
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT varName, current_varTitle FROM variable_titles")
+        for var_name, title in cursor.fetchall():
+            # Keep the first title for a varName, as the old per-variable LIMIT 1 lookup did
+            titles.setdefault(var_name, title)
+    except sqlite3.Error:
+        # If variable_titles table doesn't exist, titles fall back to the varName
+        pass
+    return titles
+
+
+def get_column_title(titles, var_name):
     """
-    Get the user-friendly column name from the variable_titles table.
+    Get the user-friendly column name for a variable.
     
     Args:
-        cursor: SQLite cursor
+        titles (dict): Lookup from get_variable_titles
         var_name (str): The variable name (e.g., 'FTE', 'LEXPTOT')
         
     Returns:
         str: The user-friendly title, or the original varName if not found
     """
-    try:
-        cursor.execute(
-            "SELECT current_varTitle FROM variable_titles WHERE varName=? LIMIT 1",
-            (var_name,)
-        )
-        result = cursor.fetchone()
-        return result[0] if result else var_name
-    except:
-        # If variable_titles table doesn't exist, just return the varName
-        return var_name
+    return titles.get(var_name, var_name)
+
+
+@lru_cache(maxsize=None)
+def extract_year(table_name):
+    """
+    Extract the year from a table name.
+    
+    Examples:
+        'drvef2019' -> '2019'
+        'f2223_f2' -> '2023' (the end year)
+        'variable_titles' -> None
+    
+    Args:
+        table_name (str): The full table name
+        
+    Returns:
+        str: The 4-digit year, or None if the table name doesn't contain one
+    """
+    match = FINANCE_YEAR_RE.match(table_name)
+    if match:
+        # Convert YYyy to 20yy (e.g., '2223' -> '2023')
+        return '20' + match.group(2)
+    
+    match = YEAR_RE.search(table_name)
+    return match.group(0) if match else None
 
 
+@lru_cache(maxsize=None)
 def get_table_type(table_name):
     """
     Extract the table type from a table name.
     
+    Results are cached - the same table name is looked up once per column.
+    
     Examples:
         'drvef2019' -> 'drvef'
         'f2223_f2' -> 'f'
@@ -100,10 +163,53 @@ def get_table_type(table_name):
     return ''.join(filter(str.isalpha, table_lower))
 
 
+def build_table_index(conn):
+    """
+    Group the database tables by table type and year.
+    
+    Built once per run and shared by all the report generators, so the table
+    list is only read (and the table names only parsed) once.
+    
+    Example:
+        {'hd': {'2023': 'hd2023'}, 'drvef': {'2023': 'drvef2023'},
+         'f': {'2023': 'f2223_f2'}, ...}
+    
+    Args:
+        conn: SQLite database connection
+        
+    Returns:
+        dict: {table_type: {year: table_name}}
+    """
+    table_index = {}
+    for table in get_database_tables(conn):
+        year = extract_year(table)
+        if year is None:
+            # Lookup tables like variable_titles
+            continue
+        table_index.setdefault(get_table_type(table), {})[year] = table
+    return table_index
+
+
+def get_index_years(table_index):
+    """
+    Get all years that have at least one table.
+    
+    Args:
+        table_index (dict): Table index from build_table_index
+        
+    Returns:
+        list: Sorted list of years
+    """
+    return sorted({year for tables_by_year in table_index.values() for year in tables_by_year})
+
+
+@lru_cache(maxsize=None)
 def should_include_variable(table_name, var_name):
     """
     Determine if a variable should be included in the report based on filters.
     
+    Results are cached, since VARIABLE_FILTERS doesn't change during a run.
+    
     Args:
         table_name (str): The table name (e.g., 'drvef2019', 'f2223_f2')
         var_name (str): The variable name (e.g., 'FTE', 'F2E131')
@@ -120,17 +226,88 @@ def should_include_variable(table_name, var_name):
         return True
     
     # Get the filter for this table type
-    filter_list = VARIABLE_FILTERS[table_type]
+    filter_set = VARIABLE_FILTERS[table_type]
     
-    # If filter is None or empty, include all variables
-    if filter_list is None or len(filter_list) == 0:
+    # If there is no filter, include all variables
+    if filter_set is None:
         return True
     
-    # Check if this variable is in the filter list
-    return var_name in filter_list
+    # Check if this variable is in the filter set
+    return var_name in filter_set
 
 
-def generate_combined_report(conn):
+def read_report_table(conn, table):
+    """
+    Read UNITID and the included variables from a data table.
+    
+    The table's columns are listed with PRAGMA table_info and filtered with
+    should_include_variable, so filtered tables (like DRVEF, where only FTE is
+    used) don't load columns that would be discarded.
+    
+    Args:
+        conn: SQLite database connection
+        table (str): The table name (e.g., 'drvef2019', 'f2223_f2')
+        
+    Returns:
+        pandas.DataFrame: UNITID plus the included variable columns
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in cursor.fetchall()]
+    
+    wanted_cols = ['UNITID'] + [
+        col for col in columns
+        if col != 'UNITID' and should_include_variable(table, col)
+    ]
+    column_list = ', '.join(f'"{col}"' for col in wanted_cols)
+    
+    return pd.read_sql_query(f"SELECT {column_list} FROM {table}", conn)
+
+
+def rename_report_columns(table_df, titles, prefix):
+    """
+    Index a table on UNITID and rename its variables for the report.
+    
+    The table should come from read_report_table, which has already dropped
+    the variables that aren't included, so every other column is renamed.
+    
+    Args:
+        table_df (DataFrame): The table as read by read_report_table
+        titles (dict): Lookup from get_variable_titles
+        prefix (str): Column name prefix (e.g., '2023 - AL' or 'AL')
+        
+    Returns:
+        pandas.DataFrame: Columns named "Prefix - VariableTitle", indexed on UNITID
+    """
+    rename_map = {
+        col: f"{prefix} - {get_column_title(titles, col)}"
+        for col in table_df.columns
+        if col != 'UNITID'
+    }
+    return table_df.set_index('UNITID').rename(columns=rename_map)
+
+
+def join_on_unitid(institutions_df, frames):
+    """
+    Join data columns onto the institution list in a single pass.
+    
+    Each frame is aligned to the institution list by its UNITID index, so
+    institutions missing from a table get empty values, and rows from a table
+    that aren't in the institution list are dropped (like a left merge).
+    
+    Args:
+        institutions_df (DataFrame): UNITID and Institution Name columns
+        frames (list): DataFrames indexed on UNITID holding the columns to add
+        
+    Returns:
+        pandas.DataFrame: The institution list with all the data columns added
+    """
+    result_df = institutions_df.set_index('UNITID')
+    aligned = [frame.reindex(result_df.index) for frame in frames]
+    return pd.concat([result_df] + aligned, axis=1).reset_index()
+
+
+def generate_combined_report(conn, table_index):
     """
     Generate a combined report with all years and all variables.
     
@@ -139,22 +316,29 @@ def generate_combined_report(conn):
     
     Args:
         conn: SQLite database connection
+        table_index (dict): Table index from build_table_index
         
     Returns:
         pandas.DataFrame: The combined report
     """
-    cursor = conn.cursor()
-    tables = get_database_tables(conn)
+    titles = get_variable_titles(conn)
     
-    # Group tables by type and year
+    # Tables are grouped by type and year
     # We have tables like: drvef2019, drvef2020, al2019, al2020, drval2019, f2223_f2, etc.
     
+    # Data tables as (table, year), sorted by table name
+    data_tables = sorted(
+        (table, year)
+        for table_type in DATA_TABLE_TYPES
+        for year, table in table_index.get(table_type, {}).items()
+    )
+    
     # Start with HD tables to get institution names
-    hd_tables = [t for t in tables if t.startswith('hd')]
+    hd_tables = table_index.get('hd', {})
     
     # Use the most recent HD table for institution names
     if hd_tables:
-        hd_table = sorted(hd_tables)[-1]
+        hd_table = hd_tables[max(hd_tables)]
         print(f"Getting institution names from {hd_table}...")
         
         query = f"SELECT UNITID, INSTNM FROM {hd_table}"
@@ -163,7 +347,7 @@ def generate_combined_report(conn):
     else:
         print("⚠ Warning: No HD table found, using UNITIDs without names")
         # Get UNITIDs from one of the data tables
-        first_table = [t for t in tables if t.startswith(('drvef', 'al', 'drval', 'f'))][0]
+        first_table = data_tables[0][0]
         query = f"SELECT DISTINCT UNITID FROM {first_table}"
         institutions_df = pd.read_sql_query(query, conn)
         institutions_df['Institution Name'] = None
@@ -174,118 +358,78 @@ def generate_combined_report(conn):
     print(f"Found {len(institutions_df)} institutions")
     
     # Now process each type of table
-    data_tables = [t for t in tables if t.startswith(('drvef', 'al', 'drval', 'f'))]
-    
-    # Sort tables by year and type
-    data_tables.sort()
-    
     print(f"\nProcessing {len(data_tables)} data tables...")
     
-    # Start with the institutions DataFrame
-    result_df = institutions_df.copy()
+    # Collect the selected columns from every table (indexed on UNITID),
+    # then join them onto the institution list in a single pass
+    frames = []
     
     # Process each data table
-    for table in data_tables:
+    for table, year in data_tables:
         print(f"  Processing {table}...")
         
-        # Read the entire table
-        table_df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-        
-        # Get year from table name
-        # For regular tables like 'drvef2019' -> '2019'
-        # For finance tables like 'f2223_f2' -> '2023' (the end year)
-        if table.lower().startswith('f'):
-            # Finance table - extract year from format like 'f2223_f2'
-            year_part = ''.join(filter(str.isdigit, table))[:4]  # Get first 4 digits
-            # Convert YYyy to 20yy (e.g., '2223' -> '2023')
-            year = '20' + year_part[2:4]
-        else:
-            year = ''.join(filter(str.isdigit, table))
+        # Read the included columns
+        # (finance tables like 'f2223_f2' are indexed under their end year, '2023')
+        table_df = read_report_table(conn, table)
         
         # Get table type
         table_type = get_table_type(table)
         
-        # Count how many variables we'll include
-        included_vars = 0
-        
-        # Merge with result_df on UNITID
-        # For each column in table_df (except UNITID), create a new column in result_df
-        for col in table_df.columns:
-            if col == 'UNITID':
-                continue
-            
-            # Check if this variable should be included
-            if not should_include_variable(table, col):
-                continue
-            
-            included_vars += 1
-            
-            # Get the user-friendly title for this variable
-            col_title = get_column_title(cursor, col)
-            
-            # Create a descriptive column name: "Year - TableType - VariableTitle"
-            new_col_name = f"{year} - {table_type.upper()} - {col_title}"
-            
-            # Merge this column into result_df
-            merge_df = table_df[['UNITID', col]].copy()
-            merge_df.columns = ['UNITID', new_col_name]
-            
-            result_df = result_df.merge(merge_df, on='UNITID', how='left')
+        # Create descriptive column names: "Year - TableType - VariableTitle"
+        table_frame = rename_report_columns(table_df, titles, f"{year} - {table_type.upper()}")
+        if len(table_frame.columns):
+            frames.append(table_frame)
         
-        print(f"    Included {included_vars} variable(s)")
+        print(f"    Included {len(table_frame.columns)} variable(s)")
+    
+    result_df = join_on_unitid(institutions_df, frames)
     
     print(f"\n✓ Combined report created: {len(result_df)} rows × {len(result_df.columns)} columns")
     
     return result_df
 
 
-def generate_year_reports(conn):
+def generate_year_reports(conn, table_index):
     """
     Generate separate reports for each year.
     
-    This creates one Excel file per year, with all variables for that year.
+    Each year becomes its own sheet in the saved workbook, with all variables for that year.
     
     Args:
         conn: SQLite database connection
+        table_index (dict): Table index from build_table_index
         
     Returns:
         dict: Dictionary with year as key and DataFrame as value
     """
-    cursor = conn.cursor()
-    tables = get_database_tables(conn)
+    titles = get_variable_titles(conn)
     
     # Group tables by year
     year_reports = {}
     
-    # Extract years from table names
-    years = set()
-    for table in tables:
-        if table.lower().startswith('f'):
-            # Finance table like 'f2223_f2'
-            year_part = ''.join(filter(str.isdigit, table))[:4]
-            year = '20' + year_part[2:4]  # Convert to 2023
-            years.add(year)
-        else:
-            year = ''.join(filter(str.isdigit, table))
-            if year and len(year) == 4:
-                years.add(year)
-    
-    years = sorted(years)
+    years = get_index_years(table_index)
     
     print(f"\nGenerating reports for {len(years)} years: {years}")
     
     for year in years:
         print(f"\n  Processing year {year}...")
         
+        # Get all data tables for this year
+        # (finance tables are indexed under their end year)
+        year_tables = [
+            table_index[table_type][year]
+            for table_type in DATA_TABLE_TYPES
+            if year in table_index.get(table_type, {})
+        ]
+        
         # Get HD table for institution names
-        hd_table = f'hd{year}'
-        if hd_table in tables:
+        hd_table = table_index.get('hd', {}).get(year)
+        if hd_table:
             query = f"SELECT UNITID, INSTNM FROM {hd_table}"
             institutions_df = pd.read_sql_query(query, conn)
             institutions_df.columns = ['UNITID', 'Institution Name']
         else:
             # Use any table from this year to get UNITIDs
-            year_tables = [t for t in tables if year in t and t.startswith(('drvef', 'al', 'drval', 'f'))]
             if year_tables:
                 query = f"SELECT DISTINCT UNITID FROM {year_tables[0]}"
                 institutions_df = pd.read_sql_query(query, conn)
@@ -294,59 +438,27 @@ def generate_year_reports(conn):
         # Sort by Institution Name
         institutions_df = institutions_df.sort_values('Institution Name').reset_index(drop=True)
         
-        # Start with institutions
-        year_df = institutions_df.copy()
-        
-        # Get all tables for this year
-        # For finance tables, need to match differently
-        year_tables = []
-        for t in tables:
-            if t.lower().startswith('f'):
-                # Finance table - check if end year matches
-                year_part = ''.join(filter(str.isdigit, t))[:4]
-                end_year = '20' + year_part[2:4]
-                if end_year == year:
-                    year_tables.append(t)
-            elif year in t and t.startswith(('drvef', 'al', 'drval')):
-                year_tables.append(t)
+        # Selected columns from each of this year's tables, indexed on UNITID
+        frames = []
         
         # Process each table
         for table in year_tables:
             print(f"    {table}...")
             
-            # Read table
-            table_df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            # Read the included columns
+            table_df = read_report_table(conn, table)
             
             # Get table type
             table_type = get_table_type(table).upper()
             
-            # Count included variables
-            included_vars = 0
+            # Create column names: "TableType - VariableTitle"
+            table_frame = rename_report_columns(table_df, titles, table_type)
+            if len(table_frame.columns):
+                frames.append(table_frame)
             
-            # Merge each column
-            for col in table_df.columns:
-                if col == 'UNITID':
-                    continue
-                
-                # Check if this variable should be included
-                if not should_include_variable(table, col):
-                    continue
-                
-                included_vars += 1
-                
-                # Get user-friendly title
-                col_title = get_column_title(cursor, col)
-                
-                # Create column name: "TableType - VariableTitle"
-                new_col_name = f"{table_type} - {col_title}"
-                
-                # Merge
-                merge_df = table_df[['UNITID', col]].copy()
-                merge_df.columns = ['UNITID', new_col_name]
-                
-                year_df = year_df.merge(merge_df, on='UNITID', how='left')
-            
-            print(f"      Included {included_vars} variable(s)")
+            print(f"      Included {len(table_frame.columns)} variable(s)")
+        
+        year_df = join_on_unitid(institutions_df, frames)
         
         print(f"    ✓ Year {year} report: {len(year_df)} rows × {len(year_df.columns)} columns")
         year_reports[year] = year_df
@@ -356,12 +468,18 @@ def generate_year_reports(conn):
 
 def save_reports(combined_df=None, year_reports=None, output_dir=None):
     """
-    Save reports to Excel files.
+    Save reports to a single Excel workbook.
+    
+    The combined report goes on a 'Combined' sheet and each year's report
+    on its own sheet (e.g., '2023').
     
     Args:
         combined_df (DataFrame): Combined report across all years
         year_reports (dict): Dictionary of year-specific reports
         output_dir (str): Directory to save files (default: current directory)
+        
+    Returns:
+        list: List of saved filenames
     """
     if output_dir is None:
         output_dir = os.getcwd()
@@ -372,32 +490,36 @@ def save_reports(combined_df=None, year_reports=None, output_dir=None):
     print("Saving Reports")
     print(f"{'='*70}")
     
-    saved_files = []
+    if combined_df is None and not year_reports:
+        print("✗ Nothing to save")
+        return []
     
-    # Save combined report
-    if combined_df is not None:
-        filename = os.path.join(output_dir, f"BCLA_Library_Combined_{timestamp}.xlsx")
-        combined_df.to_excel(filename, index=False)
-        print(f"✓ Saved combined report: {filename}")
-        saved_files.append(filename)
+    filename = os.path.join(output_dir, f"BCLA_Library_{timestamp}.xlsx")
     
-    # Save year-specific reports
-    if year_reports:
-        for year, df in year_reports.items():
-            filename = os.path.join(output_dir, f"BCLA_Library_{year}_{timestamp}.xlsx")
-            df.to_excel(filename, index=False)
-            print(f"✓ Saved {year} report: {filename}")
-            saved_files.append(filename)
+    with pd.ExcelWriter(filename, engine=EXCEL_ENGINE) as writer:
+        # Save combined report
+        if combined_df is not None:
+            combined_df.to_excel(writer, sheet_name='Combined', index=False)
+            print(f"✓ Added combined report (sheet 'Combined')")
+        
+        # Save year-specific reports
+        if year_reports:
+            for year, df in year_reports.items():
+                df.to_excel(writer, sheet_name=str(year), index=False)
+                print(f"✓ Added {year} report (sheet '{year}')")
+    
+    print(f"✓ Saved workbook: {filename}")
     
-    return saved_files
+    return [filename]
 
 
-def generate_summary_report(conn):
+def generate_summary_report(conn, table_index):
     """
     Generate a summary report showing data availability.
     
     Args:
         conn: SQLite database connection
+        table_index (dict): Table index from build_table_index
         
     Returns:
         pandas.DataFrame: Summary report
@@ -407,22 +529,9 @@ def generate_summary_report(conn):
     print(f"{'='*70}")
     
     cursor = conn.cursor()
-    tables = get_database_tables(conn)
     
     # Get all years
-    years = set()
-    for table in tables:
-        if table.lower().startswith('f'):
-            # Finance table
-            year_part = ''.join(filter(str.isdigit, table))[:4]
-            year = '20' + year_part[2:4]
-            years.add(year)
-        else:
-            year = ''.join(filter(str.isdigit, table))
-            if year and len(year) == 4:
-                years.add(year)
-    
-    years = sorted(years)
+    years = get_index_years(table_index)
     
     summary_data = []
     
@@ -431,21 +540,14 @@ def generate_summary_report(conn):
         
         # Check each table type
         for table_type in ['DRVEF', 'AL', 'DRVAL', 'F']:
-            # Build expected table name
-            if table_type == 'F':
-                # Finance table - need to construct the name
-                # For year 2023, finance table is f2223_f2
-                prev_year = str(int(year) - 1)
-                table_name = f"f{prev_year[-2:]}{year[-2:]}_f2"
-            else:
-                table_name = f"{table_type.lower()}{year}"
+            # Look up the table for this type and year
+            # (for year 2023, the finance table is f2223_f2)
+            table_name = table_index.get(table_type.lower(), {}).get(year)
             
-            if table_name in tables:
+            if table_name:
                 # Count institutions
-                query = f"SELECT COUNT(DISTINCT UNITID) as count FROM {table_name}"
-                result = pd.read_sql_query(query, conn)
-                count = result['count'].iloc[0]
-                year_data[table_type] = count
+                cursor.execute(f"SELECT COUNT(DISTINCT UNITID) FROM {table_name}")
+                year_data[table_type] = cursor.fetchone()[0]
             else:
                 year_data[table_type] = 'N/A'
         
@@ -460,11 +562,11 @@ def generate_summary_report(conn):
     print(f"\n{'='*70}")
     print("Variable Filters Applied")
     print(f"{'='*70}")
-    for table_type, filter_list in VARIABLE_FILTERS.items():
-        if filter_list is None or len(filter_list) == 0:
+    for table_type, filter_set in VARIABLE_FILTERS.items():
+        if filter_set is None:
             print(f"{table_type.upper()}: All variables included")
         else:
-            print(f"{table_type.upper()}: Only including {filter_list}")
+            print(f"{table_type.upper()}: Only including {sorted(filter_set)}")
     
     return summary_df
 
@@ -489,15 +591,18 @@ def main():
     # Connect to database
     conn = sqlite3.connect(DB_PATH)
     
+    # Look up the database tables once for all the reports
+    table_index = build_table_index(conn)
+    
     # Generate summary
-    summary_df = generate_summary_report(conn)
+    summary_df = generate_summary_report(conn, table_index)
     
     # Ask user what type of report they want
     print(f"\n{'='*70}")
     print("Report Options")
     print(f"{'='*70}")
-    print("1. Combined report (all years in one file)")
-    print("2. Separate reports by year")
+    print("1. Combined report (all years on one sheet)")
+    print("2. Separate reports by year (one sheet per year)")
     print("3. Both")
     
     choice = input("\nEnter your choice (1/2/3): ").strip()
@@ -507,11 +612,11 @@ def main():
     
     if choice in ['1', '3']:
         print(f"\nGenerating combined report...")
-        combined_df = generate_combined_report(conn)
+        combined_df = generate_combined_report(conn, table_index)
     
     if choice in ['2', '3']:
         print(f"\nGenerating year-specific reports...")
-        year_reports = generate_year_reports(conn)
+        year_reports = generate_year_reports(conn, table_index)
     
     # Save reports
     if combined_df is not None or year_reports is not None:
@@ -3,13 +3,20 @@ BCLA Library Data - Variable Titles Import
 This script imports variable titles from IPEDS Excel documentation files
 and creates a lookup table for user-friendly column names.
 
-Required packages: pandas, openpyxl
-Install with: pip install pandas openpyxl
+Required packages: pandas, openpyxl, python-calamine
+Install with: pip install pandas openpyxl python-calamine
+
+Sheets are read with the (much faster) calamine engine when python-calamine
+is installed, and with openpyxl otherwise.
+
+Optional: pyarrow (caches each parsed vartable sheet as a .parquet file)
 """
 
 import sqlite3
 import pandas as pd
 import os
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
 
 # ============================================================================
 # CONFIGURATION
@@ -54,10 +61,142 @@ FILE_MAPPINGS = [
     }
 ]
 
+# Excel reader engine - calamine is much faster than openpyxl for reading,
+# but fall back to openpyxl if python-calamine isn't installed
+EXCEL_READ_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+
+# pyarrow is optional - it enables the Parquet cache and Arrow-backed strings
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Parsed vartable sheets are cached next to each Excel file as
+# {file}.{sheet}.parquet when pyarrow is installed
+PARQUET_CACHE_ENABLED = PYARROW_AVAILABLE
+
+# varName/varTitle are read as pandas strings, stored in Arrow arrays when
+# pyarrow is installed (more compact than Python string objects)
+STRING_DTYPE = 'string[pyarrow]' if PYARROW_AVAILABLE else 'string'
+
 # ============================================================================
 # FUNCTIONS
 # ============================================================================
 
+def read_vartable_sheet(file_path, sheet_name):
+    """
+    Read the varName and varTitle columns from one vartable sheet.
+    
+    The Excel engine still loads the whole sheet, but only varName and
+    varTitle are converted into the DataFrame. The header names are checked
+    during the same read, so a sheet without those columns is reported
+    along with the columns it does have.
+    
+    If pyarrow is installed, the result is cached as {file_path}.{sheet_name}.parquet
+    and reused on later runs while the Excel file's modification time and size
+    exactly match the ones recorded in the cache.
+    
+    Args:
+        file_path (str): Path to the IPEDS documentation Excel file
+        sheet_name (str): Name of the vartable sheet
+        
+    Returns:
+        pandas.DataFrame: varName and varTitle columns, or None if the sheet doesn't have them
+    """
+    # Use the cached copy only if it was made from this exact Excel file
+    # (a replaced file can be older than the cache, so mtimes aren't compared)
+    cache_path = f"{file_path}.{sheet_name}.parquet"
+    source_stat = os.stat(file_path)
+    source_key = f"{source_stat.st_mtime_ns}-{source_stat.st_size}"
+    if PARQUET_CACHE_ENABLED and os.path.exists(cache_path):
+        cached_df = pd.read_parquet(cache_path, engine='pyarrow')
+        if cached_df.attrs.get('source_key') == source_key:
+            return cached_df
+    
+    # pandas checks every header name against usecols before building the
+    # DataFrame, so record them to report what the sheet has if a column is missing
+    header_cols = []
+    
+    def is_wanted_column(col):
+        """Match varName/varTitle case-insensitively, recording each header name."""
+        header_cols.append(col)
+        return str(col).lower() in ('varname', 'vartitle')
+    
+    # Read only the varName and varTitle columns from the Excel sheet
+    # Matched case-insensitively to handle NCES case changes
+    # (older files use 'varName'/'varTitle'; newer files use 'VarName'/'VarTitle')
+    df = pd.read_excel(
+        file_path,
+        sheet_name=sheet_name,
+        usecols=is_wanted_column,
+        dtype=STRING_DTYPE,
+        engine=EXCEL_READ_ENGINE
+    )
+    
+    # Normalize column names to lowercase
+    df.columns = [col.lower() for col in df.columns]
+    
+    # The sheet should have 'varName' and 'varTitle' columns
+    if 'varname' not in df.columns or 'vartitle' not in df.columns:
+        print(f"  ⚠ Warning: Required columns not found in {file_path}")
+        print(f"  Available columns: {header_cols}")
+        return None
+    
+    # Put the columns in the expected order and restore the expected names for rest of script
+    df = df[['varname', 'vartitle']]
+    df.columns = ['varName', 'varTitle']
+    
+    # Cache for the next run - a failed write only costs the speedup
+    # (pandas stores df.attrs, and so the source key, in the Parquet metadata)
+    if PARQUET_CACHE_ENABLED:
+        df.attrs['source_key'] = source_key
+        try:
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+        except OSError as e:
+            print(f"  ⚠ Warning: Could not write cache {cache_path}: {e}")
+    
+    return df
+
+
+def read_year_mapping(mapping):
+    """
+    Read the variable mappings for one year.
+    
+    Runs in a worker process (see read_variable_mappings), so any error is
+    reported here and the year is skipped.
+    
+    Args:
+        mapping (dict): File info from FILE_MAPPINGS ('file', 'sheet', 'year')
+        
+    Returns:
+        pandas.DataFrame: varName, varTitle and year columns, or None if the year couldn't be read
+    """
+    try:
+        file_path = mapping['file']
+        sheet_name = mapping['sheet']
+        year = mapping['year']
+        
+        print(f"Reading {file_path}, sheet {sheet_name}...")
+        
+        # Read the varName and varTitle columns
+        df = read_vartable_sheet(file_path, sheet_name)
+        if df is None:
+            return None
+        
+        df['year'] = year
+        
+        # Remove duplicate varNames within this year (keep first occurrence)
+        row_count = len(df)
+        df = df.drop_duplicates(subset=['varName'])
+        dup_count = row_count - len(df)
+        if dup_count > 0:
+            print(f"  Found {dup_count} duplicate varName entries, keeping first occurrence")
+        
+        print(f"  ✓ Loaded {len(df)} variable mappings for year {year}")
+        return df
+        
+    except Exception as e:
+        print(f"  ✗ Error processing {mapping['file']}: {str(e)}")
+        return None
+
+
 def read_variable_mappings(file_mappings):
     """
     Read variable mappings from Excel documentation files.
@@ -66,59 +205,33 @@ def read_variable_mappings(file_mappings):
     These sheets contain the variable names (like 'FTE', 'LEXPTOT') and their
     user-friendly titles (like 'Full-time equivalent fall enrollment').
     
+    The files are read in parallel, one worker process per file.
+    
     Args:
         file_mappings (list): List of dictionaries with file info
         
     Returns:
         list: List of DataFrames, one per year
     """
-    all_mappings = []
-    
+    # Check which files exist before starting any workers
+    present_mappings = []
     for mapping in file_mappings:
-        try:
-            file_path = mapping['file']
-            sheet_name = mapping['sheet']
-            year = mapping['year']
-            
-            # Check if file exists
-            if not os.path.exists(file_path):
-                print(f"⚠ Warning: {file_path} not found, skipping year {year}")
-                continue
-            
-            print(f"Reading {file_path}, sheet {sheet_name}...")
-            
-            # Read the Excel sheet
-            # Read the Excel sheet
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            
-            # Normalize column names to lowercase to handle NCES case changes
-            # (older files use 'varName'/'varTitle'; newer files use 'VarName'/'VarTitle')
-            df.columns = [col.lower() for col in df.columns]
-            
-            # The sheet should have 'varName' and 'varTitle' columns
-            if 'varname' not in df.columns or 'vartitle' not in df.columns:
-                print(f"  ⚠ Warning: Required columns not found in {file_path}")
-                print(f"  Available columns: {list(df.columns)}")
-                continue
-            
-            # Select only the columns we need
-            df = df[['varname', 'vartitle']].copy()
-            df.columns = ['varName', 'varTitle']  # Restore expected names for rest of script
-            df['year'] = year
-            
-            # Remove duplicate varNames within this year (keep first occurrence)
-            dup_count = df['varName'].duplicated().sum()
-            if dup_count > 0:
-                print(f"  Found {dup_count} duplicate varName entries, keeping first occurrence")
-                df = df.drop_duplicates(subset=['varName'])
-            
-            all_mappings.append(df)
-            print(f"  ✓ Loaded {len(df)} variable mappings for year {year}")
-            
-        except Exception as e:
-            print(f"  ✗ Error processing {mapping['file']}: {str(e)}")
-    
-    return all_mappings
+        if not os.path.exists(mapping['file']):
+            print(f"⚠ Warning: {mapping['file']} not found, skipping year {mapping['year']}")
+            continue
+        present_mappings.append(mapping)
+    
+    if not present_mappings:
+        return []
+    
+    # Excel parsing is CPU-bound, so read each file in its own process
+    # (progress messages from different files may be interleaved)
+    max_workers = min(len(present_mappings), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # map() returns the results in file_mappings order
+        results = list(executor.map(read_year_mapping, present_mappings))
+    
+    return [df for df in results if df is not None]
 
 
 def create_consolidated_variables_table(all_mappings):
@@ -139,6 +252,10 @@ def create_consolidated_variables_table(all_mappings):
         print("No mapping data available.")
         return None
     
+    # Years and their title columns, in FILE_MAPPINGS order
+    years = tuple(mapping['year'] for mapping in FILE_MAPPINGS)
+    title_cols = tuple(f'varTitle_{year}' for year in years)
+    
     # Combine all DataFrames
     combined_df = pd.concat(all_mappings, ignore_index=True)
     
@@ -146,58 +263,33 @@ def create_consolidated_variables_table(all_mappings):
     all_var_names = combined_df['varName'].unique()
     print(f"\nTotal unique variable names: {len(all_var_names)}")
     
-    # Create result DataFrame
-    result_data = {
-        'varName': all_var_names,
-        'id': range(1, len(all_var_names) + 1)
-    }
-    
-    # Add title columns for each year
-    for mapping in FILE_MAPPINGS:
-        year = mapping['year']
-        result_data[f'varTitle_{year}'] = [None] * len(all_var_names)
+    # Pivot to one row per variable with one title column per year
+    title_pivot = combined_df.pivot_table(
+        index='varName', columns='year', values='varTitle', aggfunc='first'
+    )
     
-    result_df = pd.DataFrame(result_data)
+    # Keep the variables in the order they first appear, and include a column
+    # for every year in FILE_MAPPINGS (even years with no file). Object columns
+    # keep the empty years as TEXT columns in SQLite rather than REAL.
+    title_pivot = title_pivot.reindex(
+        index=pd.Index(all_var_names, name='varName'),
+        columns=list(years)
+    ).astype(object)
+    title_pivot.columns = list(title_cols)
     
-    # Fill in the titles for each year
-    for mapping in FILE_MAPPINGS:
-        year = mapping['year']
-        year_df = combined_df[combined_df['year'] == year]
-        
-        # Create lookup dictionary
-        year_titles = dict(zip(year_df['varName'], year_df['varTitle']))
-        
-        # Fill in titles
-        for idx, row in result_df.iterrows():
-            var_name = row['varName']
-            if var_name in year_titles:
-                result_df.at[idx, f'varTitle_{year}'] = year_titles[var_name]
+    # Create result DataFrame
+    result_df = title_pivot.reset_index()
+    result_df.insert(1, 'id', range(1, len(result_df) + 1))
     
     # Check for variations in titles across years
-    def has_variations(row):
-        """Check if a variable has different titles in different years."""
-        titles = []
-        for mapping in FILE_MAPPINGS:
-            year = mapping['year']
-            title = row.get(f'varTitle_{year}')
-            if pd.notnull(title):
-                titles.append(title)
-        
-        # Return True if more than one unique title exists
-        return len(set(titles)) > 1 if titles else False
-    
-    result_df['has_variations'] = result_df.apply(has_variations, axis=1)
+    # (True if a variable has more than one distinct title; missing years are ignored)
+    result_df['has_variations'] = result_df[list(title_cols)].nunique(axis=1, dropna=True) > 1
     
     # Use the most recent title as the current title
-    # Start with the most recent year and work backwards
-    years_sorted = sorted([m['year'] for m in FILE_MAPPINGS], reverse=True)
-    result_df['current_varTitle'] = None
-    
-    for year in years_sorted:
-        # Fill missing values with this year's title
-        result_df['current_varTitle'] = result_df['current_varTitle'].fillna(
-            result_df[f'varTitle_{year}']
-        )
+    # With the year columns ordered newest first, a backfill across each row
+    # leaves the most recent available title in the first column
+    newest_first_cols = [f'varTitle_{year}' for year in sorted(years, reverse=True)]
+    result_df['current_varTitle'] = result_df[newest_first_cols].bfill(axis=1).iloc[:, 0]
     
     return result_df
 
@@ -218,28 +310,57 @@ def save_to_sqlite(df, db_path, table_name="variable_titles"):
         # Connect to SQLite database
         conn = sqlite3.connect(db_path)
         
-        # Drop table if it exists
-        conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-        
-        # Write the DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Create indexes for faster lookups
-        conn.execute(f"CREATE UNIQUE INDEX idx_{table_name}_id ON {table_name} (id)")
+        # WAL with synchronous=NORMAL only syncs at checkpoints rather than on
+        # every commit; sorting for the index builds stays in memory
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
         
-        # Only create unique index on varName if there are no duplicates
-        if not df['varName'].duplicated().any():
-            conn.execute(f"CREATE UNIQUE INDEX idx_{table_name}_varName ON {table_name} (varName)")
+        # Integer and True/False columns are stored as INTEGER, everything else as TEXT
+        column_defs = ', '.join(
+            f'"{col}" INTEGER' if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+            else f'"{col}" TEXT'
+            for col, dtype in df.dtypes.items()
+        )
+        placeholders = ', '.join('?' * len(df.columns))
         
-        print(f"✓ Saved {len(df)} rows to {table_name}")
+        # Plain Python values for sqlite3 (missing titles become NULL)
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
         
-        # Create a view for easy lookups
-        conn.execute(f"DROP VIEW IF EXISTS {table_name}_lookup")
-        conn.execute(f"""
-            CREATE VIEW {table_name}_lookup AS
-            SELECT varName, current_varTitle
-            FROM {table_name}
-        """)
+        # Replace the table, its indexes and the view in a single transaction
+        with conn:
+            conn.execute("BEGIN")
+            
+            # Drop table if it exists
+            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+            
+            # Write the rows to SQLite
+            # The table is created without any indexes or constraints, so the rows
+            # are inserted without index maintenance
+            conn.execute(f"CREATE TABLE {table_name} ({column_defs})")
+            conn.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", rows)
+            
+            # Create indexes for faster lookups
+            # (built once over the loaded rows, after the insert has finished)
+            conn.execute(f"CREATE UNIQUE INDEX idx_{table_name}_id ON {table_name} (id)")
+            
+            # Only create unique index on varName if there are no duplicates
+            if not df['varName'].duplicated().any():
+                conn.execute(f"CREATE UNIQUE INDEX idx_{table_name}_varName ON {table_name} (varName)")
+            
+            # Gather statistics for the query planner now that the indexes exist
+            conn.execute(f"ANALYZE {table_name}")
+            
+            print(f"✓ Saved {len(df)} rows to {table_name}")
+            
+            # Create a view for easy lookups
+            conn.execute(f"DROP VIEW IF EXISTS {table_name}_lookup")
+            conn.execute(f"""
+                CREATE VIEW {table_name}_lookup AS
+                SELECT varName, current_varTitle
+                FROM {table_name}
+            """)
         
         print(f"✓ Created view '{table_name}_lookup' for easy lookups")
         
@@ -270,21 +391,16 @@ def verify_variable_titles(db_path, table_name='variable_titles'):
     sample_df = pd.read_sql_query(query, conn)
     
     print("\nSample variable mappings:")
-    for _, row in sample_df.iterrows():
-        print(f"  {row['varName']:15} → {row['current_varTitle']}")
+    print(sample_df.to_string(index=False, max_colwidth=60))
     
-    # Count total variables
-    query = f"SELECT COUNT(*) as count FROM {table_name}"
-    count_df = pd.read_sql_query(query, conn)
-    total = count_df['count'].iloc[0]
+    # Count total variables and variables with title variations in one query
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(has_variations = 1), 0) FROM {table_name}")
+    total, variations = cursor.fetchone()
     
     print(f"\nTotal variables in lookup table: {total}")
     
     # Check for variations
-    query = f"SELECT COUNT(*) as count FROM {table_name} WHERE has_variations = 1"
-    var_df = pd.read_sql_query(query, conn)
-    variations = var_df['count'].iloc[0]
-    
     if variations > 0:
         print(f"Variables with title changes across years: {variations}")
     